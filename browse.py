@@ -1,45 +1,130 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import multiprocessing
+import os
 import random
-import subprocess
-import sys
-from io import BytesIO
+import stat
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import date, datetime, time
 from pathlib import Path
+from time import monotonic
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import SessionLocal
+try:
+    import imagesize  # type: ignore
+except ImportError:
+    imagesize = None
+
+from db import SessionLocal, get_db
 from models import Dataset
-from storage import is_hidden_or_metadata_path
+from storage import IMAGE_EXTS, is_hidden_or_metadata_name, list_image_files, walk_files
+from thumbnails import cached_thumbnail, write_cached_thumbnail
 
 router = APIRouter()
 
+# Blocking filesystem / Pillow work for async endpoints.
+_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="browse-io")
+
 
-def _get_dataset_by_partner_and_name_or_404(partner_id: str, dataset_name: str) -> Dataset:
+@dataclass(frozen=True)
+class DatasetInfo:
+    """
+    Detached snapshot of a Dataset row, safe to cache across requests/sessions.
+    """
+
+    id: str
+    partner_id: str
+    name: str
+    path: str
+    file_count: int
+    total_size_bytes: int
+    uploaded_at: datetime
+
+
+# (partner_id, dataset_name) -> (dataset, monotonic expiry time)
+_DATASET_CACHE: OrderedDict[tuple[str, str], tuple[DatasetInfo, float]] = OrderedDict()
+_DATASET_CACHE_SIZE = 1024
+# Uploads only invalidate the cache of the process that handled them; with several
+# server workers, the others pick up a re-upload once their entry expires.
+_DATASET_CACHE_TTL_S = 5.0
+_dataset_cache_generation = 0
+
+
+async def _get_dataset_by_partner_and_name_or_404(partner_id: str, dataset_name: str) -> DatasetInfo:
     """
     Lookup dataset by partner + name. If multiple matches exist, returns the most recently uploaded.
+
+    Results are kept in a short-lived LRU cache, cleared by uploads in this process (see
+    `invalidate_dataset_cache`); misses raise and are therefore never cached.
     """
-    db = SessionLocal()
-    d = (
-        db.query(Dataset)
-        .filter(Dataset.partner_id == partner_id, Dataset.name == dataset_name)
-        .order_by(Dataset.uploaded_at.desc())
-        .first()
-    )
+    key = (partner_id, dataset_name)
+    cached = _DATASET_CACHE.get(key)
+    if cached is not None:
+        if cached[1] > monotonic():
+            _DATASET_CACHE.move_to_end(key)
+            return cached[0]
+        del _DATASET_CACHE[key]
+
+    generation = _dataset_cache_generation
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(Dataset)
+            .where(Dataset.partner_id == partner_id, Dataset.name == dataset_name)
+            .order_by(Dataset.uploaded_at.desc())
+            .limit(1)
+        )
+        d = result.scalars().first()
     if not d:
         raise HTTPException(status_code=404, detail="Dataset not found for partner_id + dataset_name")
-    return d
+
+    info = DatasetInfo(
+        id=d.id,
+        partner_id=d.partner_id,
+        name=d.name,
+        path=d.path,
+        file_count=d.file_count,
+        total_size_bytes=d.total_size_bytes,
+        uploaded_at=d.uploaded_at,
+    )
+    # Don't store a result that an upload may have superseded while we were querying.
+    if generation == _dataset_cache_generation:
+        _DATASET_CACHE[key] = (info, monotonic() + _DATASET_CACHE_TTL_S)
+        if len(_DATASET_CACHE) > _DATASET_CACHE_SIZE:
+            _DATASET_CACHE.popitem(last=False)
+    return info
+
+
+def invalidate_dataset_cache() -> None:
+    global _dataset_cache_generation
+    _dataset_cache_generation += 1
+    _DATASET_CACHE.clear()
+
+
+def _json_response(content: Any) -> Response:
+    # orjson serializes datetimes natively and is much faster than FastAPI's
+    # jsonable_encoder + stdlib json path, especially for the large /datasets and /preview bodies.
+    return Response(orjson.dumps(content), media_type="application/json")
 
 
 @router.get("/datasets")
-def list_datasets():
-    db = SessionLocal()
-    datasets = db.query(Dataset).all()
+async def list_datasets(db: AsyncSession = Depends(get_db)):
+    datasets = (await db.execute(select(Dataset))).scalars().all()
 
-    return [
+    return _json_response([
         {
             "id": d.id,
             "partner_id": d.partner_id,
@@ -49,16 +134,16 @@ def list_datasets():
             "uploaded_at": d.uploaded_at,
         }
         for d in datasets
-    ]
+    ])
 
 
 @router.get("/datasets/by-name")
-def dataset_by_name(partner_id: str, dataset_name: str):
+async def dataset_by_name(partner_id: str, dataset_name: str):
     """
     Convenience lookup so you can browse using partner_id + dataset_name (no dataset_id needed).
     """
-    d = _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
-    return {
+    d = await _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
+    return _json_response({
         "id": d.id,
         "partner_id": d.partner_id,
         "name": d.name,
@@ -66,7 +151,7 @@ def dataset_by_name(partner_id: str, dataset_name: str):
         "total_size_bytes": d.total_size_bytes,
         "uploaded_at": d.uploaded_at,
         "path": d.path,
-    }
+    })
 
 
 def _safe_relpath(rel: str) -> Path:
@@ -81,33 +166,79 @@ def _safe_relpath(rel: str) -> Path:
     return Path(*p.parts)
 
 
-def _safe_join_dataset(root: Path, rel: str) -> Path:
-    root_resolved = root.resolve()
-    full = (root / _safe_relpath(rel)).resolve()
-    if full != root_resolved and root_resolved not in full.parents:
+# dataset_id -> realpath of the dataset root, resolved once per process.
+_RESOLVED_ROOTS: dict[str, str] = {}
+
+
+def _resolved_root(d: DatasetInfo) -> str:
+    root = _RESOLVED_ROOTS.get(d.id)
+    if root is None:
+        root = _RESOLVED_ROOTS[d.id] = os.path.realpath(d.path)
+    return root
+
+
+def _safe_join_dataset(root_resolved: str, rel: str) -> Path:
+    """
+    Join a client-supplied relative path onto an already-resolved dataset root.
+
+    `_safe_relpath` rejects absolute paths and ".."; the joined path is still resolved so
+    that symlinks inside the dataset can't point outside it.
+    """
+    full = os.path.realpath(os.path.join(root_resolved, _safe_relpath(rel)))
+    if full != root_resolved and not full.startswith(root_resolved + os.sep):
         raise HTTPException(status_code=400, detail="Path escapes dataset root")
-    return full
+    return Path(full)
+
+
+# (dataset_id, path, max_depth, max_entries) -> (dataset root, root mtime_ns, serialized JSON)
+_TREE_CACHE: OrderedDict[tuple[str, str, int, int], tuple[str, int, bytes]] = OrderedDict()
+_TREE_CACHE_SIZE = 256
+# Populated from the response-streaming thread, read from the event loop.
+_TREE_CACHE_LOCK = threading.Lock()
+_TREE_CHUNK_SIZE = 64 * 1024
+
+
+def invalidate_tree_cache(dataset_path: str) -> None:
+    """
+    Drop cached trees for every dataset stored at `dataset_path`. Uploads into an
+    existing directory don't necessarily change the root's mtime.
+    """
+    with _TREE_CACHE_LOCK:
+        for key in [k for k, v in _TREE_CACHE.items() if v[0] == dataset_path]:
+            del _TREE_CACHE[key]
 
 
 @router.get("/datasets/tree")
-def dataset_tree(
+async def dataset_tree(
     partner_id: str,
     dataset_name: str,
 ):
     """
     Return a directory tree for a dataset.
+
+    The JSON body is streamed while the directory is walked. Complete responses are
+    cached per dataset and reused while the root directory's mtime is unchanged.
     """
     path = ""
     max_depth = 5
     max_entries = 2000
 
-    d = _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
+    d = await _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
     root = Path(d.path)
 
-    if not root.exists():
+    try:
+        root_mtime_ns = os.stat(root).st_mtime_ns
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Dataset path missing on disk")
 
-    start = root if not path else _safe_join_dataset(root, path)
+    cache_key = (d.id, path, max_depth, max_entries)
+    with _TREE_CACHE_LOCK:
+        cached = _TREE_CACHE.get(cache_key)
+        if cached is not None and cached[1] == root_mtime_ns:
+            _TREE_CACHE.move_to_end(cache_key)
+            return Response(cached[2], media_type="application/json")
+
+    start = root if not path else _safe_join_dataset(_resolved_root(d), path)
     if not start.exists():
         raise HTTPException(status_code=404, detail="Path not found")
     if not start.is_dir():
@@ -116,110 +247,306 @@ def dataset_tree(
     truncated = False
     entries_seen = 0
 
-    def _rel(p: Path) -> str:
-        return "" if p == root else str(p.relative_to(root))
+    start_rel = _safe_relpath(path).as_posix() if path else ""
 
-    def _build_dir_node(dir_path: Path, depth: int) -> dict[str, Any]:
+    def _iter_dir_json(dir_path: str, name: str, rel: str, depth: int) -> Iterator[bytes]:
         nonlocal truncated, entries_seen
-        node: dict[str, Any] = {
-            "type": "directory",
-            "name": dir_path.name if dir_path != root else "",
-            "path": _rel(dir_path),
-            "children": [],
-        }
-
-        if depth >= max_depth or truncated:
-            return node
+        yield (
+            b'{"type":"directory","name":'
+            + orjson.dumps(name)
+            + b',"path":'
+            + orjson.dumps(rel)
+            + b',"children":['
+        )
 
-        children = sorted(
-            dir_path.iterdir(),
-            key=lambda p: (not p.is_dir(), p.name.lower()),
+        if depth < max_depth and not truncated:
+            # One scandir pass; DirEntry caches the file type from the directory read,
+            # so sorting and the per-child checks don't hit the filesystem again.
+            with os.scandir(dir_path) as it:
+                children = list(it)
+            children.sort(key=lambda e: (not e.is_dir(follow_symlinks=False), e.name.lower()))
+
+            first = True
+            for child in children:
+                if is_hidden_or_metadata_name(child.name):
+                    continue
+                if entries_seen >= max_entries:
+                    truncated = True
+                    break
+                entries_seen += 1
+
+                if not first:
+                    yield b","
+                first = False
+
+                rel_child = f"{rel}/{child.name}" if rel else child.name
+                if child.is_dir(follow_symlinks=False):
+                    yield from _iter_dir_json(child.path, child.name, rel_child, depth + 1)
+                else:
+                    yield orjson.dumps(
+                        {
+                            "type": "file",
+                            "name": child.name,
+                            "path": rel_child,
+                            "size_bytes": child.stat(follow_symlinks=False).st_size,
+                        }
+                    )
+
+        yield b"]}"
+
+    def _iter_response_json() -> Iterator[bytes]:
+        header = orjson.dumps(
+            {
+                "partner_id": partner_id,
+                "dataset_name": dataset_name,
+                "dataset_id": d.id,
+                "root_path": start_rel,
+                "max_depth": max_depth,
+                "max_entries": max_entries,
+            }
         )
-        for child in children:
-            rel_child = child.relative_to(root)
-            if is_hidden_or_metadata_path(rel_child):
-                continue
-            if entries_seen >= max_entries:
+        yield header[:-1] + b',"tree":'
+        yield from _iter_dir_json(str(start), start.name if path else "", start_rel, 0)
+        # Only known once the walk is done, so these come last.
+        yield b',"entries_returned":' + orjson.dumps(entries_seen) + b',"truncated":' + orjson.dumps(truncated) + b"}"
+
+    def _iter_chunks() -> Iterator[bytes]:
+        # Coalesce the many small fragments into larger writes, and keep the full body
+        # for the cache once the walk has completed.
+        body: list[bytes] = []
+        pending: list[bytes] = []
+        pending_size = 0
+        for fragment in _iter_response_json():
+            pending.append(fragment)
+            pending_size += len(fragment)
+            if pending_size >= _TREE_CHUNK_SIZE:
+                chunk = b"".join(pending)
+                body.append(chunk)
+                pending, pending_size = [], 0
+                yield chunk
+        if pending:
+            chunk = b"".join(pending)
+            body.append(chunk)
+            yield chunk
+
+        with _TREE_CACHE_LOCK:
+            _TREE_CACHE[cache_key] = (d.path, root_mtime_ns, b"".join(body))
+            if len(_TREE_CACHE) > _TREE_CACHE_SIZE:
+                _TREE_CACHE.popitem(last=False)
+
+    return StreamingResponse(_iter_chunks(), media_type="application/json")
+
+
+# pyarrow is only ever imported inside the preview worker process, so a broken
+# local installation can crash the worker without taking down the web server.
+pq: Any = None
+
+_PREVIEW_MAX_COLUMNS = 16
+_PREVIEW_TIMEOUT_S = 20
+_PREVIEW_WORKERS = min(4, os.cpu_count() or 1)
+# Never fork the (multi-threaded) server process: forked workers can inherit locks held
+# by other threads. forkserver isn't available on Windows, where spawn is the default.
+_PREVIEW_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+_PREVIEW_POOL: ProcessPoolExecutor | None = None
+_PREVIEW_POOL_LOCK = threading.Lock()
+# Pools whose workers were terminated after a timeout (see `_discard_preview_pool`).
+_KILLED_POOLS: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+# Bounds in-flight previews across all requests to one per worker, so peak worker memory
+# is predictable and the timeout only covers time actually spent in a worker (not queueing).
+_PREVIEW_SEM = asyncio.Semaphore(_PREVIEW_WORKERS)
+_PREVIEW_MAX_CELL_BYTES = 4096
+_PREVIEW_MAX_BYTES_PER_FILE = 256 * 1024
+
+
+def _init_pyarrow() -> None:
+    """
+    Import pyarrow once per worker process. Import errors are deferred to `_preview_one`
+    so they are reported per file instead of breaking the pool.
+    """
+    global pq
+    if pq is not None:
+        return
+    try:
+        import pyarrow.parquet as _pq
+    except ImportError:
+        return
+    pq = _pq
+
+
+_ORJSON_NATIVE_TYPES = (str, float, bool, datetime, date, time, uuid.UUID)
+
+
+def _jsonable(value: Any) -> Any:
+    """
+    Convert a value from `to_pylist()` into something orjson serializes natively.
+    Everything else (Decimal, bytes, timedelta, ints beyond 64 bits, ...) becomes str(value).
+    """
+    if value is None or isinstance(value, _ORJSON_NATIVE_TYPES):
+        return value
+    if isinstance(value, int):
+        return value if -(1 << 63) <= value < (1 << 64) else str(value)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return str(value)
+
+
+def _preview_cell(value: Any) -> Any:
+    value = _jsonable(value)
+    if isinstance(value, str):
+        # Cheap length check first; only encode strings that could be over the limit.
+        if len(value) <= _PREVIEW_MAX_CELL_BYTES // 4:
+            return value
+        size = len(value.encode("utf-8", "replace"))
+    elif isinstance(value, (list, dict)):
+        # Nested (list / struct / map) cells are capped by their serialized size.
+        size = len(orjson.dumps(value))
+    else:
+        return value
+    if size > _PREVIEW_MAX_CELL_BYTES:
+        return f"<…truncated {size} bytes>"
+    return value
+
+
+def _preview_one(parquet_path: str, n: int) -> dict[str, Any]:
+    """
+    Read the first N rows of a parquet file. Runs inside the preview worker process.
+
+    Long cell values are replaced by a placeholder, and rows stop being added once the
+    file's preview would exceed _PREVIEW_MAX_BYTES_PER_FILE of JSON.
+    """
+    _init_pyarrow()
+    if pq is None:
+        raise RuntimeError("pyarrow not installed (pip install pyarrow)")
+
+    pf = pq.ParquetFile(parquet_path)
+    columns = pf.schema_arrow.names[:_PREVIEW_MAX_COLUMNS]
+
+    # Only the projected columns are read, one N-row batch at a time, so a preview never
+    # decodes more of a (possibly million-row) row group than it returns.
+    rows: list[dict[str, Any]] = []
+    preview_bytes = 0
+    truncated = False
+    for batch in pf.iter_batches(batch_size=n, columns=columns):
+        for raw_row in batch.to_pylist()[: n - len(rows)]:
+            row = {k: _preview_cell(v) for k, v in raw_row.items()}
+            preview_bytes += len(orjson.dumps(row))
+            if preview_bytes > _PREVIEW_MAX_BYTES_PER_FILE:
                 truncated = True
                 break
-            entries_seen += 1
-
-            if child.is_dir():
-                node["children"].append(_build_dir_node(child, depth + 1))
-            else:
-                node["children"].append(
-                    {
-                        "type": "file",
-                        "name": child.name,
-                        "path": str(rel_child),
-                        "size_bytes": child.stat().st_size,
-                    }
-                )
+            rows.append(row)
+        if truncated or len(rows) >= n:
+            break
 
-        return node
+    return {"rows": rows, "columns": columns, "returned": len(rows), "truncated": truncated}
 
-    tree = _build_dir_node(start, 0)
-    return {
-        "partner_id": partner_id,
-        "dataset_name": dataset_name,
-        "dataset_id": d.id,
-        "root_path": _rel(start),
-        "max_depth": max_depth,
-        "max_entries": max_entries,
-        "entries_returned": entries_seen,
-        "truncated": truncated,
-        "tree": tree,
-    }
+
+def _get_preview_pool() -> ProcessPoolExecutor:
+    global _PREVIEW_POOL
+    with _PREVIEW_POOL_LOCK:
+        if _PREVIEW_POOL is None:
+            _PREVIEW_POOL = ProcessPoolExecutor(
+                max_workers=_PREVIEW_WORKERS, mp_context=_PREVIEW_MP_CONTEXT, initializer=_init_pyarrow
+            )
+        return _PREVIEW_POOL
 
 
-def _parquet_preview_subprocess(parquet_path: Path, n: int) -> dict[str, Any]:
+def _discard_preview_pool(pool: ProcessPoolExecutor, *, kill: bool = False) -> None:
     """
-    Generate a parquet preview in a separate Python process.
+    Drop a crashed or wedged pool; the next preview starts a fresh pool.
 
-    This avoids taking down the web server in case the local pyarrow installation
-    is misconfigured and crashes the interpreter.
+    With `kill`, the worker processes are terminated first, so a worker stuck on a
+    slow file doesn't outlive the pool (holding its memory). Other previews that were
+    running on it fail with BrokenProcessPool and are retried by `_parquet_preview`.
     """
-    code = r"""
-import json
-import sys
-
-parquet_path = sys.argv[1]
-n = int(sys.argv[2])
-
-import pyarrow as pa
-import pyarrow.parquet as pq
-
-pf = pq.ParquetFile(parquet_path)
-batch = next(pf.iter_batches(batch_size=n), None)
-if batch is None:
-    print(json.dumps({"rows": [], "columns": [], "returned": 0}))
-    raise SystemExit(0)
-
-table = pa.Table.from_batches([batch])
-print(
-    json.dumps(
-        {"rows": table.to_pylist(), "columns": table.schema.names, "returned": table.num_rows},
-        default=str,
-    )
-)
-"""
-    proc = subprocess.run(
-        [sys.executable, "-c", code, str(parquet_path), str(n)],
-        capture_output=True,
-        text=True,
-        timeout=20,
-    )
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        raise RuntimeError(stderr or f"preview subprocess failed (exit={proc.returncode})")
-    out = (proc.stdout or "").strip()
-    if not out:
-        return {"rows": [], "columns": [], "returned": 0}
-    return json.loads(out)
+    global _PREVIEW_POOL
+    with _PREVIEW_POOL_LOCK:
+        if _PREVIEW_POOL is pool:
+            _PREVIEW_POOL = None
+    if kill:
+        _KILLED_POOLS.add(pool)
+        # ProcessPoolExecutor has no public way to stop busy workers before Python 3.14.
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+    pool.shutdown(wait=False)
+
+
+def shutdown_preview_pool() -> None:
+    global _PREVIEW_POOL
+    with _PREVIEW_POOL_LOCK:
+        pool, _PREVIEW_POOL = _PREVIEW_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _parquet_preview(parquet_path: str, n: int) -> dict[str, Any]:
+    """
+    Generate a parquet preview in the long-lived preview worker pool.
+    """
+    async with _PREVIEW_SEM:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = _get_preview_pool()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(pool, _preview_one, parquet_path, n),
+                    timeout=_PREVIEW_TIMEOUT_S,
+                )
+            except BrokenProcessPool:
+                # Killed because another preview timed out: this file wasn't the problem.
+                if pool in _KILLED_POOLS and attempt == 0:
+                    continue
+                _discard_preview_pool(pool)
+                raise RuntimeError("preview worker crashed")
+            except asyncio.TimeoutError:
+                _discard_preview_pool(pool, kill=True)
+                raise RuntimeError(f"preview timed out after {_PREVIEW_TIMEOUT_S}s")
+        raise AssertionError("unreachable")
+
+
+def _list_preview_files(
+    root: Path, max_parquet_files: int, max_image_files: int
+) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """
+    Collect (absolute path, relative path) pairs for parquet and image files in one walk.
+    """
+    parquet_files: list[tuple[str, str]] = []
+    image_files: list[tuple[str, str]] = []
+    for entry, rel in walk_files(root):
+        ext = os.path.splitext(entry.name)[1].lower()
+        if ext == ".parquet":
+            parquet_files.append((entry.path, rel))
+        elif ext in IMAGE_EXTS:
+            image_files.append((entry.path, rel))
+    parquet_files.sort(key=lambda f: f[1])
+    image_files.sort(key=lambda f: f[1])
+    return parquet_files[:max_parquet_files], image_files[:max_image_files]
+
+
+def _image_size(path: str) -> tuple[int, int]:
+    """
+    Read image dimensions from the file header, falling back to Pillow for formats
+    imagesize can't parse.
+    """
+    if imagesize is not None:
+        try:
+            width, height = imagesize.get(path)
+        except Exception:
+            width, height = -1, -1
+        if width > 0 and height > 0:
+            return width, height
+
+    from PIL import Image  # type: ignore
+
+    with Image.open(path) as img:
+        return img.size
 
 
 @router.get("/preview")
-def preview_dataset(
+async def preview_dataset(
     partner_id: str,
     dataset_name: str,
     parquet_rows: int = Query(5, ge=1, le=200),
@@ -228,75 +555,94 @@ def preview_dataset(
     High-level preview: given partner_id + dataset_name, returns previews for all parquet and images.
     - parquet: first N rows for each file
     - images: thumbnail as a data URL (base64)
+
+    Files are previewed concurrently (parquet in the worker pool, images in a thread pool).
     """
-    d = _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
+    d = await _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
     root = Path(d.path)
 
     if not root.exists():
         raise HTTPException(status_code=404, detail="Dataset path missing on disk")
 
-    errors: list[dict[str, Any]] = []
+    try:
+        from PIL import Image  # type: ignore  # noqa: F401
+    except Exception:
+        raise HTTPException(status_code=500, detail="Pillow not installed (pip install pillow)")
 
-    # --- parquet previews ---
-    parquet_previews: list[dict[str, Any]] = []
+    errors: list[dict[str, Any]] = []
     max_parquet_files = 25
     max_image_files = 50
-    thumbnail_max_size = 256
 
-    parquet_files = sorted(root.rglob("*.parquet"))[:max_parquet_files]
-    for f in parquet_files:
-        rel = str(f.relative_to(root))
-        try:
-            preview = _parquet_preview_subprocess(f, parquet_rows)
-            parquet_previews.append(
-                {
-                    "path": rel,
-                    "rows": preview.get("rows", []),
-                    "returned": preview.get("returned", 0),
-                    "columns": preview.get("columns", []),
-                }
-            )
-        except Exception as e:
-            errors.append({"type": "parquet", "path": rel, "error": str(e)})
+    loop = asyncio.get_running_loop()
+    parquet_files, image_files = await loop.run_in_executor(
+        _IO_POOL, _list_preview_files, root, max_parquet_files, max_image_files
+    )
 
-    # --- image thumbnails (as URLs) ---
-    image_previews: list[dict[str, Any]] = []
-    try:
-        from PIL import Image  # type: ignore
-    except Exception:
-        raise HTTPException(status_code=500, detail="Pillow not installed (pip install pillow)")
+    parquet_results, image_results = await asyncio.gather(
+        asyncio.gather(*(_parquet_preview(f, parquet_rows) for f, _rel in parquet_files), return_exceptions=True),
+        asyncio.gather(
+            *(loop.run_in_executor(_IO_POOL, _image_size, f) for f, _rel in image_files), return_exceptions=True
+        ),
+    )
 
-    image_exts = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic"}
-    image_files = [p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in image_exts]
-    image_files = sorted(image_files)[:max_image_files]
+    # --- parquet previews ---
+    parquet_previews: list[dict[str, Any]] = []
+    for (_f, rel), preview in zip(parquet_files, parquet_results):
+        if isinstance(preview, BaseException):
+            errors.append({"type": "parquet", "path": rel, "error": str(preview)})
+            continue
+        parquet_previews.append(
+            {
+                "path": rel,
+                "rows": preview.get("rows", []),
+                "returned": preview.get("returned", 0),
+                "columns": preview.get("columns", []),
+                "truncated": preview.get("truncated", False),
+            }
+        )
 
-    for f in image_files:
-        rel = str(f.relative_to(root))
-        try:
-            with Image.open(f) as img:
-                image_previews.append(
-                    {
-                        "path": rel,
-                        "width": img.size[0],
-                        "height": img.size[1],
-                        "thumbnail_url": f"/thumbnail?partner_id={partner_id}&dataset_name={dataset_name}&path={rel}",
-                    }
-                )
-        except Exception as e:
-            errors.append({"type": "image", "path": rel, "error": str(e)})
+    # --- image thumbnails (as URLs) ---
+    image_previews: list[dict[str, Any]] = []
+    for (_f, rel), size in zip(image_files, image_results):
+        if isinstance(size, BaseException):
+            errors.append({"type": "image", "path": rel, "error": str(size)})
+            continue
+        image_previews.append(
+            {
+                "path": rel,
+                "width": size[0],
+                "height": size[1],
+                "thumbnail_url": f"/thumbnail?partner_id={partner_id}&dataset_name={dataset_name}&path={rel}",
+            }
+        )
 
-    return {
+    return _json_response({
         "partner_id": partner_id,
         "dataset_name": dataset_name,
         "dataset_id": d.id,
         "parquet": {"count": len(parquet_files), "previews": parquet_previews},
         "images": {"count": len(image_files), "previews": image_previews},
         "errors": errors,
-    }
+    })
+
+
+def _random_image(root: Path) -> tuple[str, str] | None:
+    image_files = list_image_files(root)
+    if not image_files:
+        return None
+    rel = random.choice(image_files)
+    return os.path.join(root, rel), rel
+
+
+def _generate_thumbnail(root: str, rel: str, full: Path) -> tuple[Path, str]:
+    try:
+        return write_cached_thumbnail(root, rel, full)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Unable to read image: {e}")
 
 
 @router.get("/thumbnail")
-def thumbnail(
+async def thumbnail(
     partner_id: str,
     dataset_name: str,
     path: str | None = None,
@@ -304,55 +650,39 @@ def thumbnail(
     """
     Return an actual image thumbnail response (image/jpeg or image/png).
     This is much easier to view than base64 blobs in Swagger.
+
+    Thumbnails are generated once per version of an image (at upload time or on first
+    request) into an on-disk cache and then served with FileResponse, which uses
+    sendfile where available.
     """
-    d = _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
+    d = await _get_dataset_by_partner_and_name_or_404(partner_id, dataset_name)
     root = Path(d.path)
+    loop = asyncio.get_running_loop()
 
-    image_exts = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic"}
     if path:
-        full = _safe_join_dataset(root, path)
+        full = _safe_join_dataset(_resolved_root(d), path)
+        rel = _safe_relpath(path).as_posix()
     else:
-        image_files = [
-            p
-            for p in root.rglob("*")
-            if p.is_file()
-            and p.suffix.lower() in image_exts
-            and not is_hidden_or_metadata_path(p.relative_to(root))
-        ]
-        if not image_files:
+        picked = await loop.run_in_executor(_IO_POOL, _random_image, root)
+        if picked is None:
             raise HTTPException(status_code=404, detail="No image files found in dataset")
-        full = random.choice(image_files)
+        full, rel = Path(picked[0]), picked[1]
 
-    if not full.exists() or not full.is_file():
+    try:
+        st = os.stat(full)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
 
+    cached = cached_thumbnail(d.path, rel, st)
+    if cached is not None:
+        return FileResponse(cached[0], media_type=cached[1])
+
     try:
-        from PIL import Image  # type: ignore
+        from PIL import Image  # type: ignore  # noqa: F401
     except Exception:
         raise HTTPException(status_code=500, detail="Pillow not installed (pip install pillow)")
 
-    thumbnail_max_size = 256
-
-    try:
-        with Image.open(full) as img:
-            img.thumbnail((thumbnail_max_size, thumbnail_max_size))
-
-            has_alpha = (
-                img.mode in ("RGBA", "LA")
-                or (img.mode == "P" and "transparency" in (img.info or {}))
-            )
-
-            out = BytesIO()
-            if has_alpha:
-                img.save(out, format="PNG")
-                media_type = "image/png"
-            else:
-                if img.mode not in ("RGB", "L"):
-                    img = img.convert("RGB")
-                img.save(out, format="JPEG", quality=85, optimize=True)
-                media_type = "image/jpeg"
-            out.seek(0)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Unable to read image: {e}")
-
-    return StreamingResponse(out, media_type=media_type)
+    cached_path, media_type = await loop.run_in_executor(_IO_POOL, _generate_thumbnail, d.path, rel, full)
+    return FileResponse(cached_path, media_type=media_type)
@@ -1,13 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from upload import router as upload_router
-from browse import router as browse_router
+from browse import router as browse_router, shutdown_preview_pool
 from ui import router as ui_router
 from db import init_db
 
-app = FastAPI()
 
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    yield
+    shutdown_preview_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(upload_router)
 app.include_router(browse_router)
-app.include_router(ui_router)
\ No newline at end of file
+app.include_router(ui_router)
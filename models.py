@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Index
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,10 @@ Base = declarative_base()
 
 class Dataset(Base):
     __tablename__ = "datasets"
+    __table_args__ = (
+        # Serves the "latest dataset for partner_id + name" lookup as an index seek.
+        Index("ix_dataset_partner_name_uploaded", "partner_id", "name", "uploaded_at"),
+    )
 
     id = Column(String, primary_key=True)
     partner_id = Column(String)
@@ -1,8 +1,35 @@
 from __future__ import annotations
 
-from pathlib import Path, PurePosixPath
+import asyncio
+import os
+import re
+import shutil
+import threading
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import BaseTarget
 
 BASE_PATH = Path("data/raw")
+THUMBS_PATH = Path("data/thumbs")
+
+IMAGE_EXTS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic"})
+
+# Any path segment starting with "." (covers .DS_Store and ._ AppleDouble files),
+# or a Windows thumbnail DB as the final segment.
+_HIDDEN_PATH_RE = re.compile(r"(?:^|/)(?:\.|Thumbs\.db$)")
+
 
 def is_hidden_or_metadata_path(path: Path) -> bool:
     """
@@ -12,26 +39,171 @@ def is_hidden_or_metadata_path(path: Path) -> bool:
     - any path segment starting with "."
     - Windows thumbnail DBs
     """
-    parts = [p for p in path.parts if p]
-    if any(part.startswith(".") for part in parts):
-        return True
-    base = path.name
-    if base in {".DS_Store", "Thumbs.db"}:
-        return True
-    if base.startswith("._"):
-        return True
-    return False
+    return _HIDDEN_PATH_RE.search(path.as_posix()) is not None
+
+
+def is_hidden_or_metadata_name(name: str) -> bool:
+    """
+    Single-segment version of `is_hidden_or_metadata_path`, for directory walks where
+    the parent segments have already been checked on the way down.
+    """
+    return name[:1] == "." or name == "Thumbs.db"
+
+
+def walk_files(root: Path) -> Iterator[tuple[os.DirEntry, str]]:
+    """
+    Recursively yield (entry, relative POSIX path) for every non-hidden file under root.
+
+    Uses os.scandir so file type checks come from the directory read, and hidden
+    directories (".git", ...) are pruned instead of being descended into.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, dir_rel = stack.pop()
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if is_hidden_or_metadata_name(entry.name):
+                    continue
+                rel = f"{dir_rel}/{entry.name}" if dir_rel else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel))
+                elif entry.is_file():
+                    yield entry, rel
+
+
+def is_image_name(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTS
+
+
+# Relative paths of every image in a dataset, one per line. Hidden, so it never shows
+# up in the tree, file counts or previews.
+IMAGE_MANIFEST_NAME = ".images.txt"
+
+
+# Running totals of a dataset directory: "<file count> <total bytes>". Updated by every
+# upload under the dataset lock, so concurrent uploads never overwrite each other's counts.
+TOTALS_NAME = ".totals"
+_LOCK_NAME = ".lock"
+
+# dataset root -> lock, used where fcntl (and so cross-process locking) is unavailable.
+_DATASET_LOCKS: dict[str, threading.Lock] = {}
+_DATASET_LOCKS_LOCK = threading.Lock()
+
+
+@contextmanager
+def _dataset_lock(root: Path) -> Iterator[None]:
+    """
+    Serialize updates to a dataset directory across threads and (via flock) across
+    server worker processes.
+    """
+    if fcntl is None:
+        with _DATASET_LOCKS_LOCK:
+            lock = _DATASET_LOCKS.setdefault(str(root), threading.Lock())
+        with lock:
+            yield
+        return
+
+    fd = os.open(root / _LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _read_totals(root: Path) -> tuple[int, int] | None:
+    try:
+        with open(root / TOTALS_NAME, encoding="utf-8") as f:
+            file_count, total_size = f.read().split()
+    except (FileNotFoundError, ValueError):
+        return None
+    return int(file_count), int(total_size)
+
+
+def _write_totals(root: Path, file_count: int, total_size: int) -> None:
+    tmp = root / f"{TOTALS_NAME}.{os.getpid()}-{os.urandom(6).hex()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write(f"{file_count} {total_size}\n")
+        os.replace(tmp, root / TOTALS_NAME)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _write_image_manifest(root: Path, image_files: list[str]) -> None:
+    manifest = root / IMAGE_MANIFEST_NAME
+    tmp = root / f"{IMAGE_MANIFEST_NAME}.{os.getpid()}-{os.urandom(6).hex()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            for rel in image_files:
+                if "\n" not in rel:
+                    out.write(rel + "\n")
+        os.replace(tmp, manifest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _add_to_image_manifest(root: Path, image_files: list[str], had_existing_files: bool) -> None:
+    """
+    Record newly uploaded images (call with the dataset lock held). Uploads into an
+    existing dataset directory keep the images already there; a directory that was
+    empty before the upload needs no walk at all.
+    """
+    if had_existing_files or (root / IMAGE_MANIFEST_NAME).exists():
+        merged = dict.fromkeys(list_image_files(root))
+        merged.update(dict.fromkeys(image_files))
+        image_files = list(merged)
+    _write_image_manifest(root, image_files)
+
+
+def dataset_totals(root: Path) -> tuple[int, int]:
+    """
+    (file count, total bytes) of the non-hidden files under a dataset root.
+    """
+    file_count = 0
+    total_size = 0
+    for entry, _rel in walk_files(root):
+        file_count += 1
+        total_size += entry.stat().st_size
+    return file_count, total_size
+
+
+def _has_visible_entries(root: Path) -> bool:
+    with os.scandir(root) as it:
+        return any(not is_hidden_or_metadata_name(entry.name) for entry in it)
+
+
+def list_image_files(root: Path) -> list[str]:
+    """
+    Relative paths of the images in a dataset, from the upload-time manifest when present
+    (falls back to walking the dataset for datasets uploaded before manifests existed).
+    """
+    try:
+        with open(root / IMAGE_MANIFEST_NAME, encoding="utf-8") as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return [rel for entry, rel in walk_files(root) if is_image_name(entry.name)]
+
+
+_SEGMENT_BAD_CHAR_RE = re.compile(r"[\x00/\\]")
+# Absolute POSIX paths and Windows drive paths (checked after backslash normalization).
+_ABS_PATH_RE = re.compile(r"^(?:/|[A-Za-z]:/)")
+# A ".." segment, or an empty one ("a//b", trailing "/").
+_BAD_PATH_SEGMENT_RE = re.compile(r"(?:^|/)(?:\.\.)?(?:/|$)")
 
 
 def _safe_segment(value: str, field_name: str) -> str:
     if not value:
         raise ValueError(f"Empty {field_name}")
-    if "\x00" in value:
-        raise ValueError(f"Invalid {field_name}")
-    if "/" in value or "\\" in value:
-        raise ValueError(f"{field_name} must be a single path segment")
     if value in (".", ".."):
         raise ValueError(f"Invalid {field_name}")
+    bad = _SEGMENT_BAD_CHAR_RE.search(value)
+    if bad is not None:
+        if bad.group() == "\x00":
+            raise ValueError(f"Invalid {field_name}")
+        raise ValueError(f"{field_name} must be a single path segment")
     return value
 
 def _safe_relpath(filename: str) -> Path:
@@ -48,33 +220,189 @@ def _safe_relpath(filename: str) -> Path:
 
     # Browsers / clients may send backslashes; normalize to POSIX separators.
     normalized = filename.replace("\\", "/")
-    p = PurePosixPath(normalized)
 
     # Disallow absolute paths and path traversal.
-    if p.is_absolute():
+    if _ABS_PATH_RE.match(normalized):
         raise ValueError(f"Absolute paths not allowed: {filename!r}")
-    if any(part in ("..", "") for part in p.parts):
-        # "" can happen with leading/trailing slashes or 'a//b'
+    if _BAD_PATH_SEGMENT_RE.search(normalized):
         raise ValueError(f"Invalid path: {filename!r}")
 
-    return Path(*p.parts)
+    return Path(normalized)
+
+
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+class _DatasetFilesTarget(BaseTarget):
+    """
+    streaming-form-data target that writes each uploaded file part, as the bytes arrive,
+    into a hidden staging directory under the dataset root. Nothing in the dataset itself
+    changes until `commit` moves the complete files into place.
+    """
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = root
+        self.staging = root / f".upload-{os.getpid()}-{os.urandom(6).hex()}"
+        self.staging.mkdir()
+        # relative POSIX path -> (staged file, bytes written); a repeated filename
+        # replaces the earlier part
+        self.staged: dict[str, tuple[Path, int]] = {}
+        # relative POSIX path -> size of the file this upload overwrote (set by `commit`)
+        self.replaced: dict[str, int] = {}
+        self._out: BinaryIO | None = None
+        self._rel: str | None = None
+
+    def on_start(self) -> None:
+        rel = _safe_relpath(self.multipart_filename or "")
+        if is_hidden_or_metadata_path(rel):
+            # Skip OS metadata / hidden files so they don't pollute datasets.
+            return
+        rel_posix = rel.as_posix()
+        tmp = self.staging / f"{len(self.staged)}.part"
+        previous = self.staged.get(rel_posix)
+        if previous is not None:
+            tmp = previous[0]
+        self._out = open(tmp, "wb", buffering=_WRITE_BUFFER_SIZE)
+        self._rel = rel_posix
+        self.staged[rel_posix] = (tmp, 0)
+
+    def on_data_received(self, chunk: bytes) -> None:
+        if self._out is not None:
+            self._out.write(chunk)
+            tmp, size = self.staged[self._rel]
+            self.staged[self._rel] = (tmp, size + len(chunk))
 
+    def on_finish(self) -> None:
+        self.close()
 
-def save_files(partner_id: str, dataset_name: str, files) -> Path:
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def commit(self) -> None:
+        """
+        Move every staged file to its final path (same filesystem, so each move is atomic).
+        """
+        created_dirs: set[Path] = set()
+        for rel, (tmp, _size) in self.staged.items():
+            dest = self.root / rel
+            if dest.parent not in created_dirs:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(dest.parent)
+            try:
+                self.replaced[rel] = os.stat(dest).st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, dest)
+
+    def discard(self) -> None:
+        self.close()
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+@dataclass(frozen=True)
+class SavedFiles:
+    root: Path
+    # files written by this upload, and the images among them
+    files_written: int
+    image_files: tuple[str, ...]
+    # totals of the whole dataset directory right after this upload
+    file_count: int
+    total_size_bytes: int
+    # when the files were moved into place; uploads to a dataset are ordered by this
+    uploaded_at: datetime
+
+
+def _commit_upload(target: _DatasetFilesTarget) -> SavedFiles:
+    """
+    Move the staged files into the dataset and update its image manifest and totals,
+    all under the dataset lock.
+    """
+    root = target.root
+    written = {rel: size for rel, (_tmp, size) in target.staged.items()}
+    with _dataset_lock(root):
+        totals = _read_totals(root)
+        had_existing_files = totals is not None or _has_visible_entries(root)
+        try:
+            target.commit()
+        finally:
+            target.discard()
+
+        if totals is not None:
+            file_count = totals[0] + len(written) - len(target.replaced)
+            total_size = totals[1] + sum(written.values()) - sum(target.replaced.values())
+        elif had_existing_files:
+            # Files from before totals were tracked: count them once.
+            file_count, total_size = dataset_totals(root)
+        else:
+            file_count, total_size = len(written), sum(written.values())
+        _write_totals(root, file_count, total_size)
+
+        new_images = [rel for rel in written if is_image_name(rel)]
+        _add_to_image_manifest(root, new_images, had_existing_files)
+
+        return SavedFiles(
+            root=root,
+            files_written=len(written),
+            image_files=tuple(new_images),
+            file_count=file_count,
+            total_size_bytes=total_size,
+            uploaded_at=datetime.utcnow(),
+        )
+
+
+async def save_files(
+    partner_id: str,
+    dataset_name: str,
+    headers: Mapping[str, str],
+    body: AsyncIterator[bytes],
+) -> SavedFiles:
+    """
+    Parse a multipart/form-data request body (file parts under the "files" field) and
+    stream every file to disk as it arrives, without spooling the request body.
+    The files only appear in the dataset directory once the whole body has been received.
+
+    Adds any new images to the dataset's image manifest and returns the directory's
+    updated totals, kept incrementally so the dataset is never walked again.
+    """
     partner_id = _safe_segment(partner_id, "partner_id")
     dataset_name = _safe_segment(dataset_name, "dataset_name")
 
+    try:
+        parser = StreamingFormDataParser(headers=headers)
+    except ParseFailedException as e:
+        raise ValueError(f"Invalid multipart request: {e}")
+
     root = BASE_PATH / partner_id / dataset_name
     root.mkdir(parents=True, exist_ok=True)
 
-    for f in files:
-        rel = _safe_relpath(f.filename)
-        if is_hidden_or_metadata_path(rel):
-            # Skip OS metadata / hidden files so they don't pollute datasets.
-            continue
-        dest = root / rel
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        with open(dest, "wb") as out:
-            out.write(f.file.read())
+    target = _DatasetFilesTarget(root)
+    parser.register("files", target)
+
+    # Parsing and disk writes are blocking; hand them to a worker thread in ~1 MiB batches
+    # so the event loop isn't held up and the per-hop overhead stays small. Any failure
+    # (bad multipart data, client disconnect, ...) leaves the dataset directory untouched.
+    pending = bytearray()
+    try:
+        async for chunk in body:
+            pending += chunk
+            if len(pending) >= _WRITE_BUFFER_SIZE:
+                await asyncio.to_thread(parser.data_received, bytes(pending))
+                pending.clear()
+        if pending:
+            await asyncio.to_thread(parser.data_received, bytes(pending))
+        target.close()
+    except ParseFailedException as e:
+        target.discard()
+        raise ValueError(f"Invalid multipart request: {e}")
+    except BaseException:
+        target.discard()
+        raise
 
-    return root
+    if not target.staged:
+        target.discard()
+        return SavedFiles(root, 0, (), 0, 0, datetime.utcnow())
+    # Not cancellable once started: the worker thread finishes the commit regardless.
+    return await asyncio.to_thread(_commit_upload, target)
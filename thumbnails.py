@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO
+
+from storage import THUMBS_PATH
+
+THUMBNAIL_MAX_SIZE = 256
+
+_CACHE_FORMATS = (("image/jpeg", ".jpg"), ("image/png", ".png"))
+
+
+def _thumbnail_dir(root: str | Path, rel: str) -> Path:
+    """
+    Cache directory for one image: keyed by the dataset path (shared by every upload
+    into that directory) and the image's relative path.
+    """
+    root_digest = hashlib.sha1(os.path.normpath(str(root)).encode("utf-8")).hexdigest()[:16]
+    rel_digest = hashlib.sha1(rel.encode("utf-8")).hexdigest()
+    return THUMBS_PATH / root_digest / rel_digest
+
+
+def thumbnail_cache_path(root: str | Path, rel: str, st: os.stat_result, media_type: str) -> Path:
+    """
+    On-disk location of the cached thumbnail for `rel` (a POSIX path relative to the
+    dataset root) at the source's current size and mtime, so a replaced image never
+    serves a stale thumbnail.
+    """
+    ext = dict(_CACHE_FORMATS)[media_type]
+    return _thumbnail_dir(root, rel) / f"{st.st_mtime_ns}-{st.st_size}{ext}"
+
+
+def cached_thumbnail(root: str | Path, rel: str, st: os.stat_result) -> tuple[Path, str] | None:
+    for media_type, _ext in _CACHE_FORMATS:
+        path = thumbnail_cache_path(root, rel, st, media_type)
+        if path.is_file():
+            return path, media_type
+    return None
+
+
+def _encode_thumbnail(src: str | Path, out: BinaryIO) -> str:
+    """
+    Write a thumbnail of `src` to `out` and return its media type (PNG if it has alpha, else JPEG).
+    """
+    from PIL import Image  # type: ignore
+
+    with Image.open(src) as img:
+        # For JPEGs, let libjpeg downscale during decode (DCT scaling) so we never
+        # materialize the full-resolution image; a no-op for other formats.
+        img.draft("RGB", (THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+        img.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+
+        has_alpha = (
+            img.mode in ("RGBA", "LA")
+            or (img.mode == "P" and "transparency" in (img.info or {}))
+        )
+
+        if has_alpha:
+            img.save(out, format="PNG")
+            return "image/png"
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(out, format="JPEG", quality=85, optimize=True)
+        return "image/jpeg"
+
+
+def write_cached_thumbnail(root: str | Path, rel: str, src: str | Path) -> tuple[Path, str]:
+    """
+    Generate the thumbnail for `rel` into the cache. The file is written under a temporary
+    name and renamed into place, so concurrent readers never see a partial image.
+    Thumbnails of earlier versions of the same image are removed.
+    """
+    st = os.stat(src)
+    dest_dir = _thumbnail_dir(root, rel)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    tmp = dest_dir / f".{os.getpid()}-{os.urandom(6).hex()}.tmp"
+    try:
+        with open(tmp, "wb") as out:
+            media_type = _encode_thumbnail(src, out)
+        dest = thumbnail_cache_path(root, rel, st, media_type)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    with os.scandir(dest_dir) as it:
+        for entry in it:
+            if entry.name != dest.name and not entry.name.startswith("."):
+                Path(entry.path).unlink(missing_ok=True)
+    return dest, media_type
+
+
+def warm_thumbnail_cache(root: Path, image_files: Iterable[str]) -> None:
+    """
+    Pre-generate cached thumbnails for the images an upload wrote (run after upload).
+    Unreadable images are skipped; /thumbnail reports their errors on demand.
+    """
+    try:
+        import PIL  # type: ignore  # noqa: F401
+    except Exception:
+        return
+
+    for rel in image_files:
+        src = root / rel
+        try:
+            if cached_thumbnail(root, rel, os.stat(src)) is not None:
+                continue
+            write_cached_thumbnail(root, rel, src)
+        except Exception:
+            continue
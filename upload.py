@@ -1,37 +1,54 @@
 import uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pathlib import Path
-from db import SessionLocal
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from browse import invalidate_dataset_cache, invalidate_tree_cache
+from db import get_db
 from models import Dataset
-from storage import is_hidden_or_metadata_path, save_files
+from storage import save_files
+from thumbnails import warm_thumbnail_cache
 
 router = APIRouter()
 
-@router.post("/upload")
-def upload(partner_id: str, dataset_name: str, files: list[UploadFile] = File(...)):
+
+# The body is parsed by hand (see storage.save_files), so describe it for /docs explicitly.
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/upload", openapi_extra=_UPLOAD_OPENAPI)
+async def upload(
+    partner_id: str,
+    dataset_name: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     dataset_id = str(uuid.uuid4())
 
     try:
         # save files to disk
-        path = save_files(partner_id, dataset_name, files)
+        saved = await save_files(partner_id, dataset_name, request.headers, request.stream())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # dataset metadata
-    root = Path(path)
-    all_files = [
-        f
-        for f in root.rglob("*")
-        if f.is_file() and not is_hidden_or_metadata_path(f.relative_to(root))
-    ]
-
-    file_count = len(all_files)
-    total_size = sum(f.stat().st_size for f in all_files)
-
-    if file_count == 0:
+    if saved.files_written == 0:
         raise HTTPException(status_code=400, detail="No uploadable files found (hidden/metadata files were skipped)")
 
-    db = SessionLocal()
+    path = saved.root
 
     dataset = Dataset(
         id=dataset_id,
@@ -39,11 +56,17 @@ def upload(partner_id: str, dataset_name: str, files: list[UploadFile] = File(..
         name=dataset_name,
         type="mixed",
         path=str(path),
-        file_count=file_count,
-        total_size_bytes=total_size,
+        file_count=saved.file_count,
+        total_size_bytes=saved.total_size_bytes,
+        uploaded_at=saved.uploaded_at,
     )
 
     db.add(dataset)
-    db.commit()
+    await db.commit()
+    invalidate_dataset_cache()
+    invalidate_tree_cache(str(path))
+
+    # Thumbnail the uploaded images after the response has been sent.
+    background_tasks.add_task(warm_thumbnail_cache, path, saved.image_files)
 
     return {"dataset_id": dataset_id}